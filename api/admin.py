@@ -1,13 +1,150 @@
+from django import forms
 from django.contrib import admin
-from .models import Product, User, Employee, Order
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Min, Max
+from django.utils.functional import cached_property
+from .models import Product, User, Employee, Order, OrderItem
 
 
-class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'total_amount', 'status', 'order_date')
-    list_filter = ('status', 'order_date', 'user')
-    
+class EstimatedCountPaginator(Paginator):
+    # An exact COUNT(*) of an unfiltered million-row table scans all of it;
+    # estimate it from the primary key range instead, which is an index lookup.
+    exact_count_below = 10000
 
-admin.site.register(User)
-admin.site.register(Employee)
-admin.site.register(Product)
-admin.site.register(Order, OrderAdmin)
\ No newline at end of file
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where or query.distinct or query.combinator:
+            return super().count
+        bounds = self.object_list.order_by().aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['high'] is None:
+            return 0
+        estimate = bounds['high'] - bounds['low'] + 1
+        if estimate < self.exact_count_below:
+            return super().count
+        return estimate
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N results (M total)"
+    show_full_result_count = False
+    # Walks the primary key index instead of sorting the table
+    ordering = ('-pk',)
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filter by a related object picked through the admin autocomplete
+    instead of listing every object of the related table.
+
+    ``field_name`` is the foreign key on ``source_model`` whose autocomplete
+    is used, ``lookup`` how the changelist queryset is filtered by its pk.
+    """
+    template = 'admin/api/autocomplete_filter.html'
+    source_model = None
+    field_name = None
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            pk = int(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters(f"Invalid {self.parameter_name}: {self.value()!r}")
+        return queryset.filter(**{self.lookup: pk}).distinct()
+
+    def choices(self, changelist):
+        field = self.source_model._meta.get_field(self.field_name)
+        form_field = field.formfield(widget=AutocompleteSelect(field, admin.site), required=False)
+        yield {
+            'selected': bool(self.value()),
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'widget': form_field.widget.render(
+                self.parameter_name, self.value(), attrs={'id': f'filter_{self.parameter_name}'}
+            ),
+            'hidden_params': [
+                (name, value) for name, value in changelist.params.items() if name != self.parameter_name
+            ],
+        }
+
+    @classmethod
+    def get_media(cls, admin_site):
+        field = cls.source_model._meta.get_field(cls.field_name)
+        return AutocompleteSelect(field, admin_site).media + forms.Media(js=['api/admin/autocomplete_filter.js'])
+
+
+class UserFilter(AutocompleteFilter):
+    title = 'user'
+    parameter_name = 'user'
+    source_model = Order
+    field_name = 'user'
+    lookup = 'user'
+
+
+class ProductFilter(AutocompleteFilter):
+    title = 'product'
+    parameter_name = 'product'
+    source_model = OrderItem
+    field_name = 'product'
+    lookup = 'items__product'
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    autocomplete_fields = ('product',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
+
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'total_amount', 'status', 'order_date')
+    list_filter = ('status', 'order_date', UserFilter, ProductFilter)
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    inlines = (OrderItemInline,)
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in (UserFilter, ProductFilter):
+            media += list_filter.get_media(self.admin_site)
+        return media
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Order.save() totals the items, which only exist once the inline is saved
+        form.instance.save()
+
+
+class UserAdmin(LargeTableAdmin):
+    list_display = ('username', 'email', 'role', 'is_staff', 'date_joined')
+    list_filter = ('role', 'is_staff', 'is_active')
+    search_fields = ('username', 'email')
+
+
+class EmployeeAdmin(LargeTableAdmin):
+    list_display = ('name', 'position', 'department', 'salary', 'hire_date')
+    search_fields = ('name',)
+
+
+class ProductAdmin(LargeTableAdmin):
+    list_display = ('name', 'category', 'price', 'stock')
+    search_fields = ('name', 'category')
+
+
+admin.site.register(User, UserAdmin)
+admin.site.register(Employee, EmployeeAdmin)
+admin.site.register(Product, ProductAdmin)
+admin.site.register(Order, OrderAdmin)
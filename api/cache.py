@@ -0,0 +1,91 @@
+"""
+Read-through response cache for the dashboard endpoints.
+
+Entries are keyed by the version counters of the tables they are computed
+from (see api/versions.py), so a write to any of those tables makes every
+dependent entry unreachable at once without having to track the keys.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .versions import get_versions
+
+CACHE_ALIAS = 'dashboard'
+
+# How long an expired entry may still be served while one request recomputes it
+STALE_GRACE = 60
+# Upper bound for a single recomputation holding the lock
+LOCK_TIMEOUT = 30
+# How long a request without a stale copy waits for the recomputing request
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_ttl(name):
+    return settings.DASHBOARD_CACHE_TTL.get(name, 30)
+
+
+def get_or_compute(name, tables, compute, ttl=None):
+    """
+    Return the cached value for ``name`` or compute and store it.
+
+    Only one caller recomputes an expired entry: the others keep serving the
+    stale copy, or wait for the fresh one when there is nothing to serve.
+    The lock is ``cache.add``, which is atomic within a process but not
+    across processes sharing the file backend, so workers may occasionally
+    recompute the same entry concurrently.
+    """
+    cache = get_cache()
+    ttl = get_ttl(name) if ttl is None else ttl
+    versions = '.'.join(str(version) for version in get_versions(tables).values())
+    key = f'response:{name}:{versions}'
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1]
+
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, (time.time() + ttl, value), timeout=ttl + STALE_GRACE)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    if entry is not None:
+        return entry[1]
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return compute()
+
+
+def cached_response(name, tables):
+    """
+    Serve a view method's response data from the dashboard cache.
+
+    ``name`` identifies the entry and its TTL, ``tables`` are the tables the
+    response is computed from.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            def compute():
+                return view_method(self, request, *args, **kwargs).data
+
+            return Response(get_or_compute(name, tables, compute))
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""
+Change log behind the incremental ``/changes/`` feed.
+
+Every insert, update and delete of a tracked row is appended to ChangeLog
+(see api/signals.py). Clients pass the cursor of their last sync and get
+back the current state of every row touched since then, plus the ids of
+deleted rows, so the payload is proportional to what changed.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .models import ChangeLog, User, Employee, Product, Order
+from .serializers import UserSerializer, EmployeeSerializer, ProductSerializer, OrderSerializer
+
+# Feed key, model and serializer of each tracked table
+FEEDS = {
+    'user': ('users', User, UserSerializer),
+    'employee': ('employees', Employee, EmployeeSerializer),
+    'product': ('products', Product, ProductSerializer),
+    'order': ('orders', Order, OrderSerializer),
+}
+
+_pending_changes = ContextVar('pending_changes', default=None)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def record(table, object_id, action):
+    pending = _pending_changes.get()
+    if pending is None:
+        ChangeLog.objects.create(table=table, object_id=object_id, action=action)
+        return
+    key = (table, object_id)
+    # An insert followed by updates in the same batch is still an insert
+    if action == 'update' and pending.get(key) == 'insert':
+        return
+    pending.pop(key, None)
+    pending[key] = action
+
+
+@contextmanager
+def batched_records():
+    """Collect changes, one per row, and write them in one query on exit."""
+    if _pending_changes.get() is not None:
+        yield
+        return
+    pending = {}
+    token = _pending_changes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_changes.reset(token)
+        ChangeLog.objects.bulk_create([
+            ChangeLog(table=table, object_id=object_id, action=action)
+            for (table, object_id), action in pending.items()
+        ])
+
+
+def get_cursor():
+    """Return the cursor of the latest change, to start syncing from."""
+    return ChangeLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def get_changes(since, limit):
+    """
+    Return the changes recorded after cursor ``since``, at most ``limit``
+    log entries at a time.
+
+    Raises CursorExpired when entries after ``since`` were already pruned and
+    the client has to resync from scratch.
+    """
+    first_id = ChangeLog.objects.order_by('id').values_list('id', flat=True).first()
+    if first_id is not None and since < first_id - 1:
+        raise CursorExpired()
+
+    entries = list(
+        ChangeLog.objects.filter(id__gt=since).order_by('id')
+        .values_list('id', 'table', 'object_id', 'action')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Only the last change of each row matters
+    touched = {}
+    for _, table, object_id, action in entries:
+        touched.setdefault(table, {})[object_id] = action
+
+    changes = {}
+    for table, rows in touched.items():
+        key, model, serializer_class = FEEDS[table]
+        upserted_ids = [object_id for object_id, action in rows.items() if action != 'delete']
+        queryset = model.objects.filter(pk__in=upserted_ids).order_by('pk')
+        if model is Order:
+            queryset = queryset.prefetch_related('items')
+        upserted = serializer_class(queryset, many=True).data
+        present = {row['id'] for row in upserted}
+        changes[key] = {
+            'upserted': upserted,
+            # Rows updated and then deleted within the window count as deleted
+            'deleted': sorted(object_id for object_id in rows if object_id not in present),
+        }
+
+    return {
+        'cursor': entries[-1][0] if entries else since,
+        'has_more': has_more,
+        'changes': changes,
+    }
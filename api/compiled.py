@@ -0,0 +1,154 @@
+"""
+Compiled read path for high-volume list endpoints.
+
+A DRF serializer walks its field objects for every row of a model instance.
+``RowEncoder`` does that walk once per serializer class instead: it works
+out which columns the fields read and generates a function turning a
+``values_list()`` tuple into the same dict the serializer would produce.
+Formatting that is not a plain ``int``/``str``/``isoformat`` call is
+delegated to the serializer field's own ``to_representation``, so Decimal
+and datetime output stays identical.
+"""
+import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ForeignKey, ManyToOneRel
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .metrics import timed_serialization
+from .serializers import TimedSerializerMixin
+
+# Serializer methods the encoder can't see into
+OPAQUE_METHODS = ('to_representation', 'get_fields')
+# Overrides known to leave the output unchanged
+TRANSPARENT_CLASSES = (TimedSerializerMixin,)
+
+# Field types whose to_representation is equivalent to a builtin
+BUILTIN_CONVERTERS = {
+    fields.IntegerField: int,
+    fields.CharField: str,
+    fields.EmailField: str,
+    fields.SlugField: str,
+}
+
+_encoders = {}
+
+
+def get_encoder(serializer_class):
+    encoder = _encoders.get(serializer_class)
+    if encoder is None:
+        encoder = _encoders[serializer_class] = RowEncoder(serializer_class)
+    return encoder
+
+
+def _converter(field):
+    """Return a callable formatting a column value like ``field`` does, or None for as-is."""
+    if type(field) in BUILTIN_CONVERTERS:
+        return BUILTIN_CONVERTERS[type(field)]
+    if type(field) is fields.DateField and getattr(field, 'format', api_settings.DATE_FORMAT) == fields.ISO_8601:
+        return datetime.date.isoformat
+    if type(field) is relations.PrimaryKeyRelatedField and field.pk_field is None:
+        return None
+    return field.to_representation
+
+
+def _check_overrides(serializer_class):
+    for klass in serializer_class.__mro__:
+        if klass in TRANSPARENT_CLASSES or klass.__module__.startswith('rest_framework.'):
+            continue
+        for method in OPAQUE_METHODS:
+            if method in vars(klass):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}: {klass.__name__}.{method}() can't be compiled."
+                )
+
+
+class RowEncoder:
+    def __init__(self, serializer_class):
+        _check_overrides(serializer_class)
+        serializer = serializer_class()
+        self.model = model = serializer.Meta.model
+        self.columns = []
+        # (related encoder, foreign key column of the related model) per nested field
+        self.nested = []
+        namespace = {}
+        items = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1:
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: dotted sources can't be compiled.")
+            model_field = model._meta.get_field(field.source)
+
+            if isinstance(field, serializers.ListSerializer) and isinstance(model_field, ManyToOneRel):
+                items.append(f'{name!r}: nested[{len(self.nested)}].get(row[{{pk}}], [])')
+                self.nested.append((get_encoder(type(field.child)), model_field.field.attname))
+                continue
+            if isinstance(field, serializers.BaseSerializer) or getattr(model_field, 'many_to_many', False):
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name}: this field can't be compiled.")
+
+            index = len(self.columns)
+            self.columns.append(model_field.attname if isinstance(model_field, ForeignKey) else model_field.name)
+            converter = _converter(field)
+            if converter is None:
+                items.append(f'{name!r}: row[{index}]')
+                continue
+            namespace[f'c{index}'] = converter
+            if model_field.null:
+                items.append(f'{name!r}: None if row[{index}] is None else c{index}(row[{index}])')
+            else:
+                items.append(f'{name!r}: c{index}(row[{index}])')
+
+        # Nested fields are looked up by primary key, read as a trailing column
+        self.pk_index = len(self.columns)
+        if self.nested:
+            self.columns.append(model._meta.pk.attname)
+        source = 'def encode(row, nested):\n    return {%s}\n' % ', '.join(items).replace('{pk}', str(self.pk_index))
+        exec(compile(source, f'<{serializer_class.__name__} row encoder>', 'exec'), namespace)
+        self.encode = namespace['encode']
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def encode_rows(self, rows):
+        """Encode ``values()`` rows, fetching nested lists with one query per nested field."""
+        rows = list(rows)
+        nested = []
+        if self.nested and rows:
+            pks = [row[self.pk_index] for row in rows]
+            for encoder, fk in self.nested:
+                related = list(
+                    encoder.model.objects.filter(**{f'{fk}__in': pks}).order_by('pk')
+                    .values_list(*encoder.columns, fk)
+                )
+                groups = {}
+                for row, item in zip(related, encoder.encode_rows(related)):
+                    groups.setdefault(row[-1], []).append(item)
+                nested.append(groups)
+        encode = self.encode
+        return [encode(row, nested) for row in rows]
+
+
+class CompiledListMixin:
+    """
+    Serve ``list`` through the serializer's compiled row encoder.
+
+    Opt in per view with ``compiled_list = True``; filtering, ordering and
+    pagination behave as on the regular path.
+    """
+    compiled_list = False
+
+    def list(self, request, *args, **kwargs):
+        if not self.compiled_list:
+            return super().list(request, *args, **kwargs)
+        encoder = get_encoder(self.get_serializer_class())
+        rows = encoder.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with timed_serialization():
+            data = encoder.encode_rows(page if page is not None else rows)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,63 @@
+"""
+Conditional GET support driven by the per-table version counters.
+
+The ETag of a response is derived from the counters of the tables it is
+built from, so ``If-None-Match`` can be answered with a 304 before any
+queryset or serializer runs. There is deliberately no ``Last-Modified``:
+HTTP dates have one-second resolution, and a write within the same second
+as a read would be missed by ``If-Modified-Since``.
+
+Responses that also depend on the clock (e.g. "the last 180 days") pass
+``max_age``, which puts the current ``max_age``-second window into the ETag.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .versions import get_versions
+
+
+def conditional_response(request, tables, get_response, max_age=None):
+    versions = get_versions(tables)
+    key = '|'.join(
+        [request.build_absolute_uri(), request.accepted_renderer.format]
+        + [f'{table}:{version}' for table, version in versions.items()]
+    )
+    if max_age:
+        key += f'|t:{int(time.time() // max_age)}'
+
+    etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        # Let clients keep the payload but always revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(*tables, max_age=None):
+    """Decorate a view's ``get`` to answer conditional requests."""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            return conditional_response(
+                request, tables, lambda: view_method(self, request, *args, **kwargs), max_age
+            )
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs of generic views from ``version_tables``."""
+    version_tables = ()
+
+    def get(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.version_tables,
+            lambda: super(ConditionalGetMixin, self).get(request, *args, **kwargs),
+        )
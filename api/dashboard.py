@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import User, Employee, Product, Order, OrderItem
+from .serializers import EmployeeSerializer, UserSerializer, OrderSerializer
+
+# Tables each dashboard payload is computed from
+SUMMARY_TABLES = ('user', 'employee', 'product', 'order')
+CHARTS_TABLES = ('product', 'order')
+ACTIVITY_TABLES = ('user', 'employee', 'order')
+
+
+def get_summary():
+    total_users = User.objects.count()
+    total_employees = Employee.objects.count()
+    total_products = Product.objects.count()
+    total_orders = Order.objects.count()
+    pending_orders= Order.objects.filter(status='pending').count() #added later
+    completed_orders= Order.objects.filter(status='completed').count() #added later
+    cancelled_orders= Order.objects.filter(status='cancelled').count() #added later
+    total_revenue = Order.objects.filter(status='completed').aggregate(
+        revenue=Sum('total_amount')
+    )['revenue'] or 0
+    due_revenue = Order.objects.filter(status='pending').aggregate(
+        revenue=Sum('total_amount')
+    )['revenue'] or 0
+
+    return {
+        "total_users": total_users,
+        "total_employees": total_employees,
+        "total_products": total_products,
+        "total_orders": total_orders,
+        "pending_orders":pending_orders, #added later
+        "completed_orders":completed_orders, #added later
+        "cancelled_orders":cancelled_orders, #added later
+        "total_revenue": total_revenue,
+        "due_revenue": due_revenue, # added later
+    }
+
+
+def get_charts():
+    # Orders per month (last 6 months)
+    six_months_ago = timezone.now() - timedelta(days=180)
+    orders_per_month = (
+        Order.objects.filter(order_date__gte=six_months_ago)
+        .annotate(month=TruncMonth('order_date'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by('month')
+    )
+
+    # Top 5 products by order count
+    top_products = (
+        OrderItem.objects.values('product__name', 'product__category', 'product__price')
+        .annotate(order_count=Count('order', distinct=True))
+        .order_by('-order_count')[:5]
+    )
+
+    return {
+        "orders_per_month": list(orders_per_month),
+        "top_products": list(top_products),
+    }
+
+
+def get_activity():
+    recent_orders = Order.objects.order_by('-order_date')[:5]
+    recent_users = User.objects.order_by('-date_joined')[:5]
+    recent_employees = Employee.objects.order_by('-hire_date')[:5]
+    return {
+        "recent_orders": OrderSerializer(recent_orders, many=True).data,
+        "recent_users": UserSerializer(recent_users, many=True).data,
+        "recent_employees": EmployeeSerializer(recent_employees, many=True).data,
+    }
@@ -0,0 +1,48 @@
+"""
+Shared state of the random data generator behind ``/generate/``.
+
+Faker is only imported when data is first generated (or by the warm-up in
+api/warmup.py), so workers that never serve ``/generate/`` don't pay for it.
+"""
+import threading
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+
+# Password of every generated user
+GENERATED_PASSWORD = 'password123'
+
+_local = threading.local()
+
+
+def get_faker():
+    """
+    Return this thread's Faker instance, with a fresh ``unique`` state.
+
+    Building a Faker loads its locale providers, so it is done once per
+    thread rather than per request.
+    """
+    fake = getattr(_local, 'faker', None)
+    if fake is None:
+        from faker import Faker
+        fake = _local.faker = Faker()
+    fake.unique.clear()
+    return fake
+
+
+def reseed_faker():
+    """
+    Reseed Faker's random source in a freshly forked worker.
+
+    Faker draws from its own ``random.Random``, which unlike the ``random``
+    module is not reseeded on fork, so workers forked after the warm-up
+    would all generate the same data.
+    """
+    if getattr(_local, 'faker', None) is not None:
+        _local.faker.seed_instance()
+
+
+@lru_cache(maxsize=None)
+def get_password_hash():
+    # Hashing is deliberately slow; generated users all share one password
+    return make_password(GENERATED_PASSWORD)
@@ -0,0 +1,281 @@
+import json
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import urls as api_urls
+from api.cache import get_cache
+from api.models import User, Employee, Product, Order, OrderItem
+from api.versions import bump
+
+API_PREFIX = '/api/v1/'
+GENERATOR_TYPES = ('users', 'employees', 'products', 'orders')
+DEPARTMENTS = ('Sales', 'HR', 'IT', 'Finance')
+CATEGORIES = ('Electronics', 'Books', 'Clothing', 'Furniture')
+STATUSES = ('pending', 'completed', 'cancelled')
+BATCH_SIZE = 5000
+# Fewer samples than this give a p95 that is little more than the slowest
+# run, too noisy to compare latency or throughput against a baseline
+MIN_COMPARE_SAMPLES = 20
+
+
+def parse_scale(value):
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def percentiles(latencies):
+    values = sorted(latencies)
+
+    def at(quantile):
+        return values[min(int(quantile * len(values)), len(values) - 1)] * 1000
+
+    return {
+        'p50_ms': round(at(0.5), 3),
+        'p95_ms': round(at(0.95), 3),
+        'p99_ms': round(at(0.99), 3),
+        'mean_ms': round(statistics.fmean(values) * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API endpoint and data generator over synthetic datasets "
+        "of several sizes, in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='10k,100k,1M',
+            help="Comma separated numbers of orders to seed, e.g. '10k,100k,1M'.",
+        )
+        parser.add_argument('--requests', type=int, default=50, help="Requests per endpoint and scale.")
+        parser.add_argument('--generate-amount', type=int, default=100, help="Rows per /generate/ call.")
+        parser.add_argument('--output', default='benchmark.json', help="Where to write the results.")
+        parser.add_argument('--baseline', help="Results file to compare against.")
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help="Allowed relative slowdown against the baseline (default 0.2 = 20%%).",
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=2.0,
+            help="Latency changes below this many ms are noise, not regressions (default 2).",
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        scales = sorted(parse_scale(scale) for scale in options['scales'].split(','))
+        random.seed(options['seed'])
+        baseline = None
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+
+        setup_test_environment()
+        # Also points mirrors such as the 'read' connection at the test database
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.admin = User.objects.create_user(
+                username='benchmark', password='benchmark', is_staff=True, role='admin'
+            )
+            self.client = APIClient()
+            self.client.force_authenticate(self.admin)
+            results = {}
+            for scale in scales:
+                self.stdout.write(f"Seeding {scale} orders...")
+                started = time.perf_counter()
+                self.seed(scale)
+                self.stdout.write(f"  seeded in {time.perf_counter() - started:.1f}s")
+                results[str(scale)] = self.run_scale(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'requests': options['requests'],
+            'results': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = self.compare(baseline['results'], results, options['threshold'], options['min_delta'])
+            if min(options['requests'] // 10, baseline['requests'] // 10) < MIN_COMPARE_SAMPLES:
+                self.stdout.write(self.style.WARNING(
+                    f"Latency and throughput are only compared with at least {MIN_COMPARE_SAMPLES} samples "
+                    f"per endpoint; write endpoints run --requests / 10 times."
+                ))
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(regression))
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}.")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def seed(self, scale):
+        """Top the dataset up to ``scale`` orders, with users, products and employees in proportion."""
+        now = timezone.now()
+        self.top_up(User, max(scale // 100, 10), lambda i: User(
+            username=f'user{i}', email=f'user{i}@example.com', role=random.choice(('user', 'manager', 'admin')),
+        ))
+        self.top_up(Employee, max(scale // 10, 10), lambda i: Employee(
+            name=f'Employee {i}', position='Engineer', department=random.choice(DEPARTMENTS),
+            salary=Decimal(random.randint(30000, 120000)), performance_score=random.randint(1, 10),
+            hire_date=(now - timedelta(days=random.randint(0, 5 * 365))).date(),
+        ))
+        self.top_up(Product, max(scale // 100, 10), lambda i: Product(
+            name=f'Product {i}', category=random.choice(CATEGORIES),
+            price=Decimal(random.randint(500, 50000)) / 100, stock=random.randint(0, 400),
+        ))
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        prices = dict(Product.objects.values_list('id', 'price'))
+        product_ids = list(prices)
+        missing = scale - Order.objects.count()
+        while missing > 0:
+            batch = min(missing, BATCH_SIZE)
+            baskets = [random.sample(product_ids, random.randint(1, 3)) for _ in range(batch)]
+            quantities = [[random.randint(1, 5) for _ in basket] for basket in baskets]
+            orders = Order.objects.bulk_create([
+                Order(
+                    user_id=random.choice(user_ids), status=random.choice(STATUSES),
+                    total_amount=sum(prices[product] * quantity for product, quantity in zip(basket, counts)),
+                )
+                for basket, counts in zip(baskets, quantities)
+            ])
+            OrderItem.objects.bulk_create([
+                OrderItem(order_id=order.id, product_id=product, quantity=quantity)
+                for order, basket, counts in zip(orders, baskets, quantities)
+                for product, quantity in zip(basket, counts)
+            ], batch_size=BATCH_SIZE)
+            missing -= batch
+        if connection.vendor == 'sqlite':
+            # Spread order dates over the last year for the charts
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE api_order SET order_date = datetime('now', '-' || (abs(random()) % 365) || ' days')"
+                )
+        # bulk_create and raw SQL bypass the signals
+        bump('user', 'employee', 'product', 'order')
+
+    def top_up(self, model, count, build):
+        existing = model.objects.count()
+        model.objects.bulk_create([build(i) for i in range(existing, count)], batch_size=BATCH_SIZE)
+
+    def endpoints(self):
+        ids = {
+            'employee-detail': Employee.objects.values_list('id', flat=True).first(),
+            'user-detail': User.objects.values_list('id', flat=True).first(),
+            'product-detail': Product.objects.values_list('id', flat=True).first(),
+            'order-detail': Order.objects.values_list('id', flat=True).first(),
+        }
+        for pattern in api_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not hasattr(view_class, 'get'):
+                continue
+            route = str(pattern.pattern)
+            if '<' in route:
+                if pattern.name not in ids:
+                    continue
+                route = route.replace('<int:pk>', str(ids[pattern.name]))
+            yield pattern.name, API_PREFIX + route
+
+    def measure(self, send, count, prepare=None):
+        latencies, queries = [], []
+        for i in range(count):
+            if prepare is not None:
+                prepare()
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+                started = time.perf_counter()
+                response = send(i)
+                latencies.append(time.perf_counter() - started)
+            queries.append(sum(len(context) for context in captured))
+            if response.status_code >= 400:
+                raise CommandError(f"{response.status_code} from benchmark request: {response.content[:200]!r}")
+        return {
+            **percentiles(latencies),
+            'queries_per_request': round(statistics.fmean(queries), 2),
+            'samples': count,
+        }
+
+    def run_scale(self, options):
+        results = {}
+        for name, url in self.endpoints():
+            # The dashboard cache would turn all but the first request into a hit,
+            # so the headline numbers are cold; cache hits are reported separately
+            results[name] = self.measure(lambda i: self.client.get(url), options['requests'], get_cache().clear)
+            self.stdout.write(f"  GET {url}: {results[name]['p95_ms']} ms p95")
+            if name.startswith('dashboard-'):
+                results[f'{name}:cached'] = self.measure(lambda i: self.client.get(url), options['requests'])
+                self.stdout.write(f"  GET {url} (cached): {results[f'{name}:cached']['p95_ms']} ms p95")
+
+        # Write endpoints, measured in rows per second
+        amount = options['generate_amount']
+        runs = max(options['requests'] // 10, 1)
+        for data_type in GENERATOR_TYPES:
+            if data_type == 'orders':
+                # Generated orders fail as a whole once a product runs out of stock
+                Product.objects.update(stock=1_000_000)
+                bump('product')
+            started = time.perf_counter()
+            stats = self.measure(lambda i: self.client.post(
+                f'{API_PREFIX}generate/', {'type': data_type, 'amount': amount}, format='json'
+            ), runs)
+            stats['rows_per_sec'] = round(amount * runs / (time.perf_counter() - started), 1)
+            results[f'generate:{data_type}'] = stats
+            self.stdout.write(f"  generate {data_type}: {stats['rows_per_sec']} rows/s")
+
+        bulk_payloads = {
+            'employee-bulk-create': lambda i: [{
+                'name': f'Bulk {i}-{n}', 'position': 'Analyst', 'department': 'IT', 'salary': '50000.00',
+                'hire_date': '2024-01-01', 'performance_score': 5,
+            } for n in range(amount)],
+            'product-bulk-create': lambda i: [{
+                'name': f'Bulk {i}-{n}', 'category': 'Books', 'price': '10.00', 'stock': 10,
+            } for n in range(amount)],
+        }
+        for name, payload in bulk_payloads.items():
+            url = f"{API_PREFIX}{name.replace('-bulk-create', 's')}/bulk_create/"
+            started = time.perf_counter()
+            stats = self.measure(lambda i: self.client.post(url, payload(i), format='json'), runs)
+            stats['rows_per_sec'] = round(amount * runs / (time.perf_counter() - started), 1)
+            results[name] = stats
+            self.stdout.write(f"  POST {url}: {stats['rows_per_sec']} rows/s")
+        return results
+
+    def compare(self, baseline, results, threshold, min_delta=0):
+        regressions = []
+        for scale, endpoints in results.items():
+            for name, stats in endpoints.items():
+                before = baseline.get(scale, {}).get(name)
+                if before is None:
+                    continue
+                label = f"[{scale}] {name}"
+                if stats['queries_per_request'] > before['queries_per_request'] * (1 + threshold):
+                    regressions.append(
+                        f"{label}: queries {before['queries_per_request']} -> {stats['queries_per_request']}"
+                    )
+                if min(before.get('samples', 0), stats['samples']) < MIN_COMPARE_SAMPLES:
+                    continue
+                if stats['p95_ms'] > max(before['p95_ms'] * (1 + threshold), before['p95_ms'] + min_delta):
+                    regressions.append(f"{label}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+                if 'rows_per_sec' in before and stats['rows_per_sec'] < before['rows_per_sec'] * (1 - threshold):
+                    regressions.append(f"{label}: {before['rows_per_sec']} -> {stats['rows_per_sec']} rows/s")
+        return regressions
@@ -0,0 +1,53 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+# Loads the WSGI application like a worker does, then times the warm-up
+BOOT_SCRIPT = """
+import time
+start = time.perf_counter()
+import config.wsgi
+loaded = time.perf_counter()
+print('wsgi', loaded - start)
+if {warmup}:
+    from api.warmup import warm_up
+    print('warmup', warm_up())
+"""
+
+
+class Command(BaseCommand):
+    help = "Report where worker boot time goes: import times of the WSGI application and the warm-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help="Number of slowest imports to list.")
+        parser.add_argument('--no-warmup', action='store_true', help="Don't run the warm-up after loading.")
+
+    def handle(self, *args, **options):
+        # A fresh interpreter, so nothing is imported yet
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT.format(warmup=not options['no_warmup'])],
+            capture_output=True, text=True, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+        )
+        if result.returncode:
+            lines = result.stderr.strip().splitlines()
+            raise CommandError(lines[-1] if lines else f"Loading the application exited with code {result.returncode}.")
+
+        imports = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                imports.append((int(cumulative_us), int(self_us), len(indent) // 2, module))
+        timings = dict(line.split() for line in result.stdout.splitlines() if line.startswith(('wsgi', 'warmup')))
+
+        self.stdout.write(f"WSGI application loaded in {float(timings['wsgi']):.3f}s")
+        if 'warmup' in timings:
+            self.stdout.write(f"Warm-up took {float(timings['warmup']):.3f}s")
+        self.stdout.write(f"{len(imports)} modules imported, slowest (cumulative / self, ms):")
+        for cumulative_us, self_us, _, module in sorted(imports, reverse=True)[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {module}")
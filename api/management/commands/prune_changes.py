@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = "Delete change log entries older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_LOG_RETENTION_DAYS,
+            help="Keep this many days of history (default: CHANGE_LOG_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Always keep the latest entry so stale cursors can still be detected
+        latest_id = ChangeLog.objects.order_by('-id').values_list('id', flat=True).first()
+        deleted, _ = ChangeLog.objects.filter(created_at__lt=cutoff).exclude(id=latest_id).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change log entries."))
@@ -0,0 +1,147 @@
+"""
+Per-request query and timing instrumentation.
+
+``QueryTimingMiddleware`` counts the SQL queries of every request and times
+them, the serializers and the request as a whole. The numbers go out as a
+``Server-Timing`` header and into rolling per-view windows, exposed in the
+Prometheus text format by the ``/metrics/`` endpoint.
+
+The windows live in process memory, so with several workers every worker
+reports its own.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+# Number of recent requests per view the quantiles are computed over
+WINDOW_SIZE = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Per-request values and their help texts
+METRICS = {
+    'request_duration_seconds': 'Total time spent handling the request.',
+    'db_duration_seconds': 'Time spent executing SQL queries.',
+    'serializer_duration_seconds': 'Time spent in serializers (includes the SQL they trigger).',
+    'db_queries': 'Number of SQL queries executed.',
+}
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time of the block to the current request's serializer time."""
+    stats = _current.get()
+    if stats is None or stats.serializer_depth:
+        # Nested serializers are already covered by the outermost one
+        yield
+        return
+    stats.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+        stats.serializer_depth -= 1
+
+
+class MetricsRegistry:
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.window_size = window_size
+        self.lock = threading.Lock()
+        self.windows = defaultdict(lambda: deque(maxlen=self.window_size))
+        self.sums = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def observe(self, view, values):
+        with self.lock:
+            for metric, value in values.items():
+                key = (metric, view)
+                self.windows[key].append(value)
+                self.sums[key] += value
+                self.counts[key] += 1
+
+    def render(self):
+        """Render all metrics as Prometheus summaries."""
+        with self.lock:
+            windows = {key: sorted(values) for key, values in self.windows.items()}
+            sums = dict(self.sums)
+            counts = dict(self.counts)
+        lines = []
+        for metric, help_text in METRICS.items():
+            name = f'qboard_{metric}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} summary')
+            for (key_metric, view), values in sorted(windows.items()):
+                if key_metric != metric:
+                    continue
+                label = f'view="{escape_label(view)}"'
+                for quantile in QUANTILES:
+                    lines.append(f'{name}{{{label},quantile="{quantile}"}} {percentile(values, quantile):g}')
+                lines.append(f'{name}_sum{{{label}}} {sums[(metric, view)]:g}')
+                lines.append(f'{name}_count{{{label}}} {counts[(metric, view)]}')
+        return '\n'.join(lines) + '\n'
+
+
+def percentile(sorted_values, quantile):
+    index = min(int(quantile * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.sql_time * 1000:.2f};desc="{stats.queries} queries"',
+            f'ser;dur={stats.serializer_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        match = request.resolver_match
+        registry.observe(match.view_name if match else 'unmatched', {
+            'request_duration_seconds': total,
+            'db_duration_seconds': stats.sql_time,
+            'serializer_duration_seconds': stats.serializer_time,
+            'db_queries': stats.queries,
+        })
+        return response
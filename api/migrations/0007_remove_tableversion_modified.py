@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_changelog'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='tableversion',
+            name='modified',
+        ),
+    ]
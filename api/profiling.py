@@ -0,0 +1,168 @@
+"""
+On-demand profiling of single requests.
+
+Staff users can profile a request by sending an ``X-Profile: 1`` header or a
+``profile=1`` query parameter; ``PROFILE_SAMPLE_RATE`` additionally profiles
+a random share of all requests. The view runs under cProfile and its SQL is
+captured (with its parameters only when a staff user asked for the profile,
+so sampled requests don't write passwords and the like to disk); both are
+saved to ``PROFILE_DIR``, which keeps the latest
+``PROFILE_MAX_CAPTURES`` captures, and can be listed and downloaded through
+the admin-only ``/profiles/`` endpoints.
+"""
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+CAPTURE_ID_RE = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+# Longest SQL statement / params stored per query
+MAX_SQL_LENGTH = 2000
+
+
+def get_profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def capture_paths(capture_id):
+    """Return the (metadata, profile) paths of a capture, or None for a bad id."""
+    if not CAPTURE_ID_RE.match(capture_id):
+        return None
+    profile_dir = get_profile_dir()
+    return profile_dir / f'{capture_id}.json', profile_dir / f'{capture_id}.prof'
+
+
+def list_captures():
+    captures = []
+    for path in sorted(get_profile_dir().glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        meta['query_count'] = len(meta.pop('queries', []))
+        captures.append(meta)
+    return captures
+
+
+def load_capture(capture_id, limit=30):
+    """Return the metadata of a capture with its top functions by cumulative time."""
+    paths = capture_paths(capture_id)
+    if paths is None or not paths[0].exists():
+        return None
+    out = io.StringIO()
+    try:
+        meta = json.loads(paths[0].read_text())
+        pstats.Stats(str(paths[1]), stream=out).sort_stats('cumulative').print_stats(limit)
+    except (OSError, EOFError, ValueError, TypeError):
+        # Pruned, or being written, between listing and loading
+        return None
+    meta['stats'] = out.getvalue()
+    return meta
+
+
+def is_staff_request(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # API clients authenticate with JWT, which only DRF views resolve
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return result is not None and result[0].is_staff
+
+
+class QueryCapture:
+    def __init__(self, with_params):
+        self.with_params = with_params
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql[:MAX_SQL_LENGTH],
+                'params': repr(params)[:MAX_SQL_LENGTH] if self.with_params else None,
+                'time_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requested = request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+        if requested:
+            if not is_staff_request(request):
+                return self.get_response(request)
+            trigger = 'request'
+        elif settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            trigger = 'sample'
+        else:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        capture = QueryCapture(with_params=requested)
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(capture))
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+
+        capture_id = self.save(request, response, profiler, capture, trigger, duration)
+        if requested:
+            response['X-Profile-Id'] = capture_id
+        return response
+
+    def save(self, request, response, profiler, capture, trigger, duration):
+        profile_dir = get_profile_dir()
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        now = timezone.now()
+        capture_id = f'{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+        meta_path, profile_path = capture_paths(capture_id)
+        match = request.resolver_match
+        profiler.dump_stats(str(profile_path))
+        meta_path.write_text(json.dumps({
+            'id': capture_id,
+            'created': now.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'trigger': trigger,
+            'duration_ms': round(duration * 1000, 3),
+            'queries': capture.queries,
+        }))
+        self.prune(profile_dir)
+        return capture_id
+
+    def prune(self, profile_dir):
+        captures = sorted(profile_dir.glob('*.json'))
+        excess = len(captures) - settings.PROFILE_MAX_CAPTURES
+        for meta_path in captures[:max(excess, 0)]:
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.prof').unlink(missing_ok=True)
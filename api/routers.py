@@ -0,0 +1,43 @@
+"""
+Read/write routing for the SQLite production profile.
+
+Requests with a safe method are read-only, so their queries go to the
+``read`` connection; everything else, and any write, goes to the single
+``default`` writer. Both point at the same WAL-mode database file, so a
+reader never lags behind a committed write and keeps reading while a
+writer, such as ``/generate/``, holds the write lock.
+"""
+from contextvars import ContextVar
+
+READ_ALIAS = 'read'
+WRITE_ALIAS = 'default'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_only = ContextVar('read_only_request', default=False)
+
+
+class ReadOnlyRequestMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_only.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+
+class ReadWriteRouter:
+    def db_for_read(self, model, **hints):
+        return READ_ALIAS if _read_only.get() else WRITE_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return WRITE_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == WRITE_ALIAS
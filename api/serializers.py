@@ -2,15 +2,35 @@ from rest_framework import serializers
 from .models import User, Employee, Product, Order, OrderItem
 from rest_framework.exceptions import ValidationError
 from django.core.mail import send_mail
+from .metrics import timed_serialization
 
-class UserSerializer(serializers.ModelSerializer):
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedSerializerMixin:
+    # Reports serializer time to the request metrics (see api/metrics.py).
+    # Timed once per .data rather than per row; many=True goes through
+    # TimedListSerializer, set as each Meta's list_serializer_class.
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role', 'date_joined']
+        list_serializer_class = TimedListSerializer
 
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
 
     class Meta:
@@ -29,34 +49,38 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['product', 'quantity']
+        list_serializer_class = TimedListSerializer
 
 
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
 
     class Meta:
         model = Order
         fields = ['id', 'user', 'status', 'order_date', 'total_amount', 'items']
         read_only_fields = ['total_amount', 'order_date']
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+
+from .models import User, Employee, Product, Order, OrderItem
+from . import changes, versions
+
+# Table each model's writes are tracked under. Order items only ever show up
+# as part of their order, so their writes count as updates of the order.
+MODEL_TABLES = {
+    User: 'user',
+    Employee: 'employee',
+    Product: 'product',
+    Order: 'order',
+    OrderItem: 'order',
+}
+
+
+@contextmanager
+def batched_writes():
+    """
+    Track the writes of a block as one batch.
+
+    Used by the bulk and generation paths, which would otherwise bump the
+    version counters and write a change log entry once per created row.
+    """
+    with versions.batched_bumps(), changes.batched_records():
+        yield
+
+
+def track_save(sender, instance, created, **kwargs):
+    table = MODEL_TABLES[sender]
+    versions.bump(table)
+    if sender is OrderItem:
+        changes.record(table, instance.order_id, 'update')
+    else:
+        changes.record(table, instance.pk, 'insert' if created else 'update')
+
+
+def track_delete(sender, instance, **kwargs):
+    table = MODEL_TABLES[sender]
+    versions.bump(table)
+    if sender is OrderItem:
+        changes.record(table, instance.order_id, 'update')
+    else:
+        changes.record(table, instance.pk, 'delete')
+
+
+for model in MODEL_TABLES:
+    post_save.connect(track_save, sender=model, dispatch_uid=f'track-{model.__name__}-save')
+    post_delete.connect(track_delete, sender=model, dispatch_uid=f'track-{model.__name__}-delete')
@@ -0,0 +1,9 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Apply an autocomplete list filter as soon as an option is picked
+    $(document).on('change', 'form.autocomplete-filter select', function() {
+        this.form.submit();
+    });
+}
@@ -0,0 +1,202 @@
+"""
+Server-Sent Events stream of dashboard updates, served by config/asgi.py.
+
+One broadcaster per process polls the table version counters and, when they
+move, computes the summary and recent activity once (through the dashboard
+cache) and wakes every subscriber. Subscribers only remember the snapshot
+they last sent, so a slow client skips intermediate states instead of
+queueing them, and each message carries just what changed since its last
+one.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+from .cache import get_or_compute
+from .dashboard import SUMMARY_TABLES, ACTIVITY_TABLES, get_summary, get_activity
+from .versions import get_versions
+
+STREAM_PATH = '/api/v1/dashboard/stream/'
+STREAM_TABLES = tuple(dict.fromkeys(SUMMARY_TABLES + ACTIVITY_TABLES))
+# Comment line sent when there is nothing new, keeps proxies from timing out
+HEARTBEAT_INTERVAL = 15
+
+logger = logging.getLogger(__name__)
+
+
+class StreamFull(Exception):
+    pass
+
+
+def build_snapshot():
+    return {
+        'summary': get_or_compute('dashboard-summary', SUMMARY_TABLES, get_summary),
+        'activity': get_or_compute('dashboard-activity', ACTIVITY_TABLES, get_activity),
+    }
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n'.encode()
+
+
+def diff_snapshots(old, new):
+    """Return the SSE messages bringing a client from ``old`` to ``new``."""
+    if old is None:
+        return format_event('snapshot', new)
+    body = b''
+    summary = {key: value for key, value in new['summary'].items() if old['summary'].get(key) != value}
+    if summary:
+        body += format_event('summary', summary)
+    activity = {}
+    for key, items in new['activity'].items():
+        seen = {item['id'] for item in old['activity'].get(key, [])}
+        added = [item for item in items if item['id'] not in seen]
+        if added:
+            activity[key] = added
+    if activity:
+        body += format_event('activity', activity)
+    return body
+
+
+class Subscriber:
+    def __init__(self):
+        self.wakeup = asyncio.Event()
+        self.sent = None
+
+
+class DashboardBroadcaster:
+    def __init__(self):
+        self.subscribers = set()
+        self.snapshot = None
+        self.versions = None
+        self.task = None
+
+    def subscribe(self):
+        if len(self.subscribers) >= settings.DASHBOARD_STREAM_MAX_CONNECTIONS:
+            raise StreamFull()
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        if self.snapshot is not None:
+            subscriber.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def run(self):
+        try:
+            while self.subscribers:
+                try:
+                    await self.poll()
+                except Exception:
+                    # e.g. "database is locked"; subscribers keep their last
+                    # snapshot and the next poll tries again
+                    logger.exception("Dashboard stream poll failed")
+                    await sync_to_async(close_old_connections)()
+                await asyncio.sleep(settings.DASHBOARD_STREAM_POLL_INTERVAL)
+        finally:
+            # Nobody is listening, the next subscriber starts from scratch
+            self.snapshot = None
+            self.versions = None
+
+    async def poll(self):
+        versions = await sync_to_async(get_versions)(STREAM_TABLES)
+        if versions != self.versions:
+            self.snapshot = await sync_to_async(build_snapshot)()
+            self.versions = versions
+            for subscriber in self.subscribers:
+                subscriber.wakeup.set()
+
+    def next_message(self, subscriber):
+        subscriber.wakeup.clear()
+        if self.snapshot is None or self.snapshot is subscriber.sent:
+            return b''
+        body = diff_snapshots(subscriber.sent, self.snapshot)
+        subscriber.sent = self.snapshot
+        return body
+
+
+broadcaster = DashboardBroadcaster()
+
+
+@sync_to_async
+def authenticate(scope):
+    # EventSource can't set headers, so the access token may come in the query
+    auth = JWTAuthentication()
+    headers = dict(scope['headers'])
+    raw_token = auth.get_raw_token(headers[b'authorization']) if b'authorization' in headers else None
+    if raw_token is None:
+        raw_token = parse_qs(scope['query_string'].decode()).get('token', [None])[0]
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def response_headers(content_type):
+    headers = [(b'content-type', content_type), (b'cache-control', b'no-cache')]
+    if settings.CORS_ALLOW_ALL_ORIGINS:
+        headers.append((b'access-control-allow-origin', b'*'))
+    return headers
+
+
+async def send_error(send, status, message):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': response_headers(b'application/json'),
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps({'detail': message}).encode()})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def dashboard_stream(scope, receive, send):
+    """ASGI app streaming ``snapshot``, ``summary`` and ``activity`` events."""
+    if scope['method'] != 'GET':
+        return await send_error(send, 405, 'Method not allowed.')
+    user = await authenticate(scope)
+    if user is None or not user.is_active:
+        return await send_error(send, 401, 'Authentication credentials were not provided or are invalid.')
+    try:
+        subscriber = broadcaster.subscribe()
+    except StreamFull:
+        return await send_error(send, 503, 'Too many open streams, retry later.')
+
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        headers = response_headers(b'text/event-stream') + [(b'x-accel-buffering', b'no')]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+        while True:
+            wakeup = asyncio.ensure_future(subscriber.wakeup.wait())
+            done, _ = await asyncio.wait(
+                {wakeup, disconnect}, timeout=HEARTBEAT_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                wakeup.cancel()
+                break
+            if wakeup not in done:
+                wakeup.cancel()
+            body = broadcaster.next_message(subscriber) or b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    except OSError:
+        pass
+    finally:
+        disconnect.cancel()
+        broadcaster.unsubscribe(subscriber)
@@ -1,3 +1,693 @@
-from django.test import TestCase
+import asyncio
+import json
+import subprocess
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .admin import EstimatedCountPaginator
+from .cache import get_cache, get_ttl
+from .dashboard import get_summary, get_activity
+from .management.commands.benchmark import Command as BenchmarkCommand, parse_scale
+from .generators import GENERATED_PASSWORD, get_faker, get_password_hash, reseed_faker
+from .metrics import timed_serialization
+from .models import User, Employee, Product, Order, OrderItem, ChangeLog
+from .profiling import capture_paths, list_captures
+from .routers import ReadOnlyRequestMiddleware, ReadWriteRouter
+from .streams import broadcaster, dashboard_stream, get_versions
+from .views import (
+    EmployeeListCreateAPIView, UserListAPIView, ProductListCreateAPIView, OrderListCreateAPIView,
+)
+
+
+class CompiledListTests(TestCase):
+    """The compiled list path must return exactly what the serializers return."""
+    databases = '__all__'
+
+    # url: (view, a query string exercising filtering and ordering)
+    list_views = {
+        '/api/v1/employees/': (EmployeeListCreateAPIView, '?department=IT&ordering=-salary'),
+        '/api/v1/users/': (UserListAPIView, '?ordering=username'),
+        '/api/v1/products/': (ProductListCreateAPIView, '?category=Books&ordering=-price'),
+        '/api/v1/orders/': (OrderListCreateAPIView, '?status=pending&ordering=-total_amount'),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='x')
+        for i in range(11):
+            User.objects.create_user(username=f'user{i}', password='x', role='manager')
+        for i in range(12):
+            Employee.objects.create(
+                name=f'Employee {i}', position='Engineer', department='IT',
+                salary=Decimal('1234.50') * (i + 1), hire_date=date(2024, 1, i + 1), performance_score=i,
+            )
+        products = [
+            Product.objects.create(name=f'Product {i}', category='Books', price=Decimal('9.99') + i, stock=10)
+            for i in range(12)
+        ]
+        for i in range(12):
+            order = Order.objects.create(user=cls.user, status='pending')
+            for product in products[:i % 3 + 1]:
+                OrderItem.objects.create(order=order, product=product, quantity=i + 1)
+            order.save()
+        # An order without items
+        Order.objects.create(user=cls.user, status='cancelled')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_compiled_matches_serializer(self):
+        for url, (view, filtered) in self.list_views.items():
+            self.assertTrue(view.compiled_list)
+            for query in ('', '?page=2', filtered):
+                with self.subTest(url=url, query=query):
+                    compiled = self.client.get(url + query)
+                    with mock.patch.object(view, 'compiled_list', False):
+                        serialized = self.client.get(url + query)
+                    self.assertEqual(compiled.status_code, 200)
+                    self.assertEqual(compiled.content, serialized.content)
+
+
+class DashboardCacheTests(TestCase):
+    """Dashboard responses are cached until a table they are computed from changes."""
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='x')
+
+    def setUp(self):
+        # Version counters restart with every test, and with them the cache keys
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self):
+        return self.client.get('/api/v1/dashboard/summary/').json()
+
+    def test_unchanged_tables_are_served_from_cache(self):
+        with mock.patch('api.views.get_summary', wraps=get_summary) as compute:
+            self.summary()
+            self.summary()
+        self.assertEqual(compute.call_count, 1)
+
+    def test_save_invalidates(self):
+        self.assertEqual(self.summary()['total_products'], 0)
+        product = Product.objects.create(name='Lamp', category='Furniture', price=Decimal('20.00'), stock=5)
+        self.assertEqual(self.summary()['total_products'], 1)
+        Order.objects.create(user=self.user, status='pending')
+        self.assertEqual(self.summary()['pending_orders'], 1)
+        product.stock = 4
+        product.save()
+        self.assertEqual(self.summary()['total_products'], 1)
+
+    def test_delete_invalidates(self):
+        product = Product.objects.create(name='Lamp', category='Furniture', price=Decimal('20.00'), stock=5)
+        self.assertEqual(self.summary()['total_products'], 1)
+        product.delete()
+        self.assertEqual(self.summary()['total_products'], 0)
+
+    def test_bulk_create_invalidates(self):
+        self.assertEqual(self.summary()['total_products'], 0)
+        response = self.client.post('/api/v1/products/bulk_create/', [
+            {'name': f'Book {i}', 'category': 'Books', 'price': '10.00', 'stock': 1} for i in range(3)
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary()['total_products'], 3)
+
+    def test_generate_invalidates(self):
+        self.assertEqual(self.summary()['total_employees'], 0)
+        response = self.client.post('/api/v1/generate/', {'type': 'employees', 'amount': 4}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary()['total_employees'], 4)
+
+    def test_writes_to_other_tables_keep_the_entry(self):
+        with mock.patch('api.views.get_activity', wraps=get_activity) as compute:
+            self.client.get('/api/v1/dashboard/activity/')
+            # Activity isn't computed from products
+            Product.objects.create(name='Lamp', category='Furniture', price=Decimal('20.00'), stock=5)
+            self.client.get('/api/v1/dashboard/activity/')
+        self.assertEqual(compute.call_count, 1)
+
+
+class ConditionalGetTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='x')
+        cls.product = Product.objects.create(name='Lamp', category='Furniture', price=Decimal('20.00'), stock=5)
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_until_a_write(self):
+        for url in ('/api/v1/products/', f'/api/v1/products/{self.product.pk}/', '/api/v1/dashboard/summary/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+                self.product.stock += 1
+                self.product.save()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_charts_etag_expires(self):
+        url = '/api/v1/dashboard/charts/'
+        now = time.time()
+        with mock.patch('api.conditional.time.time', return_value=now):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch('api.conditional.time.time', return_value=now + get_ttl('dashboard-charts')):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ChangeFeedTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cursor = self.client.get('/api/v1/changes/').json()['cursor']
+
+    def changes(self, since=None, **params):
+        return self.client.get('/api/v1/changes/', {'since': self.cursor if since is None else since, **params})
+
+    def create_product(self, name='Lamp'):
+        return Product.objects.create(name=name, category='Furniture', price=Decimal('20.00'), stock=5)
+
+    def test_updates_compact_to_latest_state(self):
+        product = self.create_product()
+        for stock in (4, 3, 2):
+            product.stock = stock
+            product.save()
+        data = self.changes().json()
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['cursor'], ChangeLog.objects.latest('id').id)
+        upserted = data['changes']['products']['upserted']
+        self.assertEqual([(row['id'], row['stock']) for row in upserted], [(product.pk, 2)])
+        self.assertEqual(data['changes']['products']['deleted'], [])
+
+    def test_insert_then_delete_is_deleted(self):
+        product = self.create_product()
+        product_id = product.pk
+        product.delete()
+        products = self.changes().json()['changes']['products']
+        self.assertEqual(products, {'upserted': [], 'deleted': [product_id]})
+
+    def test_paging(self):
+        ids = [self.create_product(f'Lamp {i}').pk for i in range(5)]
+        seen, pages, cursor = [], 0, self.cursor
+        while True:
+            data = self.changes(since=cursor, limit=2).json()
+            pages += 1
+            seen += [row['id'] for row in data['changes']['products']['upserted']]
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, ids)
+        self.assertEqual(self.changes(since=cursor).json()['changes'], {})
+
+    def test_pruned_cursor_is_gone(self):
+        self.create_product('Old')
+        self.create_product('New')
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=30))
+        call_command('prune_changes', days=7, stdout=StringIO())
+        # The latest entry survives so that stale cursors can be told apart
+        self.assertEqual(ChangeLog.objects.count(), 1)
+        self.assertEqual(self.changes().status_code, 410)
+        latest = ChangeLog.objects.get().id
+        self.assertEqual(self.changes(since=latest - 1).status_code, 200)
+
+    def test_generate_writes_one_entry_per_row(self):
+        for i in range(3):
+            Product.objects.create(name=f'Book {i}', category='Books', price=Decimal('10.00'), stock=1000)
+        self.cursor = self.client.get('/api/v1/changes/').json()['cursor']
+        response = self.client.post('/api/v1/generate/', {'type': 'orders', 'amount': 5}, format='json')
+        self.assertEqual(response.json()['count'], 5)
+
+        entries = list(ChangeLog.objects.filter(id__gt=self.cursor).values_list('table', 'object_id', 'action'))
+        self.assertEqual(len(entries), len({(table, object_id) for table, object_id, _ in entries}))
+        orders = [entry for entry in entries if entry[0] == 'order']
+        self.assertEqual(len(orders), 5)
+        self.assertEqual({action for _, _, action in orders}, {'insert'})
+
+
+class StreamClient:
+    """Drives the dashboard_stream ASGI app and collects what it sends."""
+
+    def __init__(self, token):
+        self.scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/dashboard/stream/',
+            'query_string': f'token={token}'.encode(), 'headers': [],
+        }
+        self.disconnect = asyncio.Event()
+        self.messages = []
+        self.task = None
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    def open(self):
+        self.task = asyncio.ensure_future(dashboard_stream(self.scope, self.receive, self.send))
+
+    @property
+    def status(self):
+        return self.messages[0]['status'] if self.messages else None
+
+    @property
+    def body(self):
+        return b''.join(message.get('body', b'') for message in self.messages[1:]).decode()
+
+    async def wait_for(self, text, timeout=5):
+        deadline = time.monotonic() + timeout
+        while text not in self.body:
+            if time.monotonic() > deadline:
+                raise AssertionError(f"{text!r} not in stream: {self.body!r}")
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        self.disconnect.set()
+        await self.task
+
+
+@override_settings(DASHBOARD_STREAM_POLL_INTERVAL=0.01)
+class DashboardStreamTests(TransactionTestCase):
+    # The stream reads the database from another thread, so the test data
+    # has to be committed
+    databases = '__all__'
+
+    def setUp(self):
+        get_cache().clear()
+        self.token = str(AccessToken.for_user(User.objects.create_user(username='alice', password='x')))
+
+    async def stop_broadcaster(self):
+        if broadcaster.task is not None:
+            await broadcaster.task
+
+    async def test_snapshot_then_delta(self):
+        client = StreamClient(self.token)
+        client.open()
+        await client.wait_for('event: snapshot')
+        self.assertEqual(client.status, 200)
+        self.assertIn('"total_employees": 0', client.body)
+
+        await sync_to_async(Employee.objects.create)(
+            name='Bob', position='Engineer', department='IT', salary=Decimal('50000.00'),
+            hire_date=date(2024, 1, 1), performance_score=5,
+        )
+        await client.wait_for('event: summary')
+        summary = client.body.split('event: summary\ndata: ')[1].split('\n')[0]
+        self.assertEqual(json.loads(summary), {'total_employees': 1})
+        await client.wait_for('event: activity')
+        await client.close()
+        await self.stop_broadcaster()
+
+    @override_settings(DASHBOARD_STREAM_MAX_CONNECTIONS=1)
+    async def test_connection_cap(self):
+        first, second = StreamClient(self.token), StreamClient(self.token)
+        first.open()
+        await first.wait_for('event: snapshot')
+        second.open()
+        await second.task
+        self.assertEqual(second.status, 503)
+        await first.close()
+        await self.stop_broadcaster()
+
+    async def test_poll_errors_dont_end_the_stream(self):
+        calls = []
+
+        def flaky_get_versions(tables):
+            calls.append(tables)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return get_versions(tables)
+
+        client = StreamClient(self.token)
+        with mock.patch('api.streams.get_versions', flaky_get_versions), self.assertLogs('api.streams', 'ERROR'):
+            client.open()
+            await client.wait_for('event: snapshot')
+        await client.close()
+        await self.stop_broadcaster()
+
+
+class RequestMetricsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='x', is_staff=True)
+        cls.user = User.objects.create_user(username='alice', password='x')
+        products = [
+            Product.objects.create(name=f'Book {i}', category='Books', price=Decimal('10.00'), stock=10)
+            for i in range(3)
+        ]
+        cls.order = Order.objects.create(user=cls.user)
+        for product in products:
+            OrderItem.objects.create(order=cls.order, product=product, quantity=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_server_timing(self):
+        response = self.client.get(f'/api/v1/orders/{self.order.pk}/')
+        timings = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timings), {'db', 'ser', 'total'})
+        self.assertRegex(timings['db'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+        self.assertRegex(timings['total'], r'^dur=[\d.]+$')
+
+    def test_serializers_are_timed_once_per_response(self):
+        with mock.patch('api.serializers.timed_serialization', wraps=timed_serialization) as timed:
+            self.client.get(f'/api/v1/orders/{self.order.pk}/')
+            self.client.get('/api/v1/dashboard/activity/')
+        # The order with its nested items, then one per activity list
+        self.assertEqual(timed.call_count, 1 + 3)
+
+    def test_metrics(self):
+        self.client.get('/api/v1/products/')
+        body = self.client.get('/api/v1/metrics/').content.decode()
+        self.assertIn('# TYPE qboard_request_duration_seconds summary', body)
+        self.assertRegex(body, r'qboard_db_queries\{view="product-list-create",quantile="0.95"\} \d+')
+        self.assertRegex(body, r'qboard_request_duration_seconds_count\{view="product-list-create"\} [1-9]')
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/v1/metrics/').status_code, 403)
+
+
+class ProfilingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='x', is_staff=True)
+
+    def setUp(self):
+        profile_dir = TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        settings_override = override_settings(PROFILE_DIR=profile_dir.name, PROFILE_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def profile(self, url='/api/v1/users/'):
+        response = self.client.get(url, HTTP_X_PROFILE='1')
+        return response['X-Profile-Id']
+
+    def test_requested_capture(self):
+        capture_id = self.profile(f'/api/v1/users/{self.admin.pk}/')
+        capture = self.client.get(f'/api/v1/profiles/{capture_id}/').json()
+        self.assertEqual(capture['trigger'], 'request')
+        self.assertIn('cumulative', capture['stats'])
+        self.assertTrue(any(query['params'] for query in capture['queries']))
+        download = self.client.get(f'/api/v1/profiles/{capture_id}/download/')
+        self.assertEqual(download.status_code, 200)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_captures_have_no_params(self):
+        self.client.credentials()
+        self.client.post('/api/v1/auth/register/', {'username': 'bob', 'password': 'secret-password'})
+        [capture] = list_captures()
+        self.assertEqual(capture['trigger'], 'sample')
+        meta_path, _ = capture_paths(capture['id'])
+        queries = json.loads(meta_path.read_text())['queries']
+        self.assertTrue(queries)
+        self.assertTrue(all(query['params'] is None for query in queries))
+        self.assertNotIn('pbkdf2', meta_path.read_text())
+
+    def test_missing_profile_is_not_found(self):
+        capture_id = self.profile()
+        capture_paths(capture_id)[1].unlink()
+        self.assertEqual(self.client.get(f'/api/v1/profiles/{capture_id}/').status_code, 404)
+
+    def test_prune(self):
+        with override_settings(PROFILE_MAX_CAPTURES=2):
+            for _ in range(3):
+                self.profile()
+            self.assertEqual(len(list_captures()), 2)
+        with override_settings(PROFILE_MAX_CAPTURES=0):
+            self.profile()
+            self.assertEqual(list_captures(), [])
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def test_parse_scale(self):
+        self.assertEqual([parse_scale(value) for value in ('500', '10k', ' 1.5K', '1M')], [500, 10_000, 1_500, 1_000_000])
+
+    def compare(self, before, after, threshold=0.2, min_delta=2.0):
+        return BenchmarkCommand().compare({'10000': before}, {'10000': after}, threshold, min_delta)
+
+    def test_regressions(self):
+        before = {
+            'order-list-create': {'p95_ms': 10.0, 'queries_per_request': 4, 'samples': 50},
+            'generate:users': {'p95_ms': 50.0, 'queries_per_request': 30, 'rows_per_sec': 1000, 'samples': 20},
+        }
+        after = {
+            'order-list-create': {'p95_ms': 15.0, 'queries_per_request': 13, 'samples': 50},
+            'generate:users': {'p95_ms': 50.0, 'queries_per_request': 30, 'rows_per_sec': 700, 'samples': 20},
+        }
+        self.assertEqual(self.compare(before, after), [
+            "[10000] order-list-create: queries 4 -> 13",
+            "[10000] order-list-create: p95 10.0 -> 15.0 ms",
+            "[10000] generate:users: 1000 -> 700 rows/s",
+        ])
+
+    def test_small_latency_changes_are_noise(self):
+        before = {'change-feed': {'p95_ms': 1.898, 'queries_per_request': 2, 'samples': 50}}
+        after = {'change-feed': {'p95_ms': 2.582, 'queries_per_request': 2, 'samples': 50}}
+        self.assertEqual(self.compare(before, after), [])
+        self.assertEqual(len(self.compare(before, after, min_delta=0)), 1)
+
+    def test_new_endpoints_are_skipped(self):
+        after = {'metrics': {'p95_ms': 100.0, 'queries_per_request': 0, 'samples': 50}}
+        self.assertEqual(self.compare({}, after), [])
+
+    def test_few_samples_only_compare_queries(self):
+        before = {'generate:users': {'p95_ms': 500.0, 'queries_per_request': 300, 'rows_per_sec': 200, 'samples': 1}}
+        after = {'generate:users': {'p95_ms': 800.0, 'queries_per_request': 400, 'rows_per_sec': 120, 'samples': 1}}
+        self.assertEqual(self.compare(before, after), ["[10000] generate:users: queries 300 -> 400"])
+
+
+class AdminTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='x')
+        cls.bob = User.objects.create_user(username='bob', password='x')
+        cls.lamp = Product.objects.create(name='Lamp', category='Furniture', price=Decimal('20.00'), stock=5)
+        cls.book = Product.objects.create(name='Book', category='Books', price=Decimal('10.00'), stock=5)
+        cls.admin_order = Order.objects.create(user=cls.admin)
+        OrderItem.objects.create(order=cls.admin_order, product=cls.lamp, quantity=1)
+        cls.bob_order = Order.objects.create(user=cls.bob)
+        OrderItem.objects.create(order=cls.bob_order, product=cls.book, quantity=2)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, query=''):
+        return self.client.get(f'/admin/api/order/{query}')
+
+    def test_changelist_filters(self):
+        for query, order in ((f'?user={self.bob.pk}', self.bob_order), (f'?product={self.lamp.pk}', self.admin_order)):
+            with self.subTest(query=query):
+                response = self.changelist(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['cl'].result_list), [order])
+
+    def test_invalid_filter_values(self):
+        for query in ('?user=abc', '?product=abc'):
+            with self.subTest(query=query):
+                response = self.changelist(query)
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(response['Location'].endswith('?e=1'))
+
+    def test_changelists_render(self):
+        for model in ('user', 'employee', 'product', 'order'):
+            with self.subTest(model=model):
+                self.assertEqual(self.client.get(f'/admin/api/{model}/').status_code, 200)
+
+    def test_paginator_counts_small_tables_exactly(self):
+        paginator = EstimatedCountPaginator(Order.objects.order_by('-pk'), 100)
+        self.assertEqual(paginator.count, 2)
+
+    def test_paginator_estimates_large_tables(self):
+        Order.objects.create(pk=self.admin_order.pk + 20000, user=self.bob)
+        paginator = EstimatedCountPaginator(Order.objects.order_by('-pk'), 100)
+        self.assertEqual(paginator.count, 20001)
+        # Filtered querysets can't be estimated from the key range
+        paginator = EstimatedCountPaginator(Order.objects.filter(user=self.bob).order_by('-pk'), 100)
+        self.assertEqual(paginator.count, 2)
+
+
+class ReadWriteRouterTests(SimpleTestCase):
+    def route(self, method):
+        router = ReadWriteRouter()
+        routes = {}
+
+        def get_response(request):
+            routes['read'] = router.db_for_read(Product)
+            routes['write'] = router.db_for_write(Product)
+
+        ReadOnlyRequestMiddleware(get_response)(getattr(RequestFactory(), method)('/api/v1/products/'))
+        return routes
+
+    def test_safe_requests_read_from_the_read_alias(self):
+        for method in ('get', 'head', 'options'):
+            with self.subTest(method=method):
+                self.assertEqual(self.route(method), {'read': 'read', 'write': 'default'})
+
+    def test_unsafe_requests_use_the_writer(self):
+        for method in ('post', 'put', 'patch', 'delete'):
+            with self.subTest(method=method):
+                self.assertEqual(self.route(method), {'read': 'default', 'write': 'default'})
+
+    def test_outside_requests_use_the_writer(self):
+        self.assertEqual(ReadWriteRouter().db_for_read(Product), 'default')
+        self.assertTrue(ReadWriteRouter().allow_migrate('default', 'api'))
+        self.assertFalse(ReadWriteRouter().allow_migrate('read', 'api'))
+
+
+@unittest.skipUnless('read' in settings.DATABASES, "Needs DB_PROFILE=production")
+class ReadWriteRoutingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries(self, send):
+        with CaptureQueriesContext(connections['default']) as writer, \
+                CaptureQueriesContext(connections['read']) as reader:
+            send()
+        return len(writer), len(reader)
+
+    def test_get_reads_from_the_read_alias(self):
+        writer, reader = self.queries(lambda: self.client.get('/api/v1/products/'))
+        self.assertEqual(writer, 0)
+        self.assertGreater(reader, 0)
+
+    def test_post_goes_to_the_writer(self):
+        writer, reader = self.queries(lambda: self.client.post('/api/v1/products/', {
+            'name': 'Lamp', 'category': 'Furniture', 'price': '20.00', 'stock': 5,
+        }, format='json'))
+        self.assertGreater(writer, 0)
+        self.assertEqual(reader, 0)
+
+
+class GeneratorTests(SimpleTestCase):
+    def setUp(self):
+        # Don't leave a seeded Faker behind for other tests
+        self.addCleanup(reseed_faker)
+
+    def test_faker_is_shared_per_thread(self):
+        fake = get_faker()
+        self.assertIs(get_faker(), fake)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_faker()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], fake)
+
+    def test_unique_values_reset_per_call(self):
+        # Without the reset the second run would exhaust the unique values
+        names = []
+        for _ in range(2):
+            fake = get_faker()
+            fake.seed_instance(0)
+            names.append([fake.unique.random_digit() for _ in range(10)])
+        self.assertEqual(names[0], names[1])
+
+    def test_reseed(self):
+        fake = get_faker()
+        fake.seed_instance(0)
+        first = [fake.user_name() for _ in range(5)]
+        # A forked worker starts from the same state, and must diverge
+        fake.seed_instance(0)
+        reseed_faker()
+        self.assertNotEqual([fake.user_name() for _ in range(5)], first)
+
+    def test_password_hash(self):
+        self.assertIs(get_password_hash(), get_password_hash())
+        self.assertTrue(check_password(GENERATED_PASSWORD, get_password_hash()))
+
+
+class GenerateTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.addCleanup(reseed_faker)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='alice', password='x'))
+
+    def seeded_faker(self):
+        fake = get_faker()
+        fake.seed_instance(0)
+        return fake
+
+    def test_generated_usernames_skip_existing_users(self):
+        # Usernames generated by an earlier call, or another worker
+        fake = self.seeded_faker()
+        taken = [fake.unique.user_name() for _ in range(3)]
+        for username in taken:
+            User.objects.create_user(username=username, password='x')
+        with mock.patch('api.views.get_faker', self.seeded_faker):
+            response = self.client.post('/api/v1/generate/', {'type': 'users', 'amount': 5}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['count'], 5)
+        self.assertEqual(User.objects.count(), 1 + 3 + 5)
+
+
+class ImportTimeCommandTests(SimpleTestCase):
+    def test_failure_without_output(self):
+        failed = subprocess.CompletedProcess(args=[], returncode=1, stdout='', stderr='')
+        with mock.patch('api.management.commands.importtime.subprocess.run', return_value=failed):
+            with self.assertRaisesMessage(CommandError, 'exited with code 1'):
+                call_command('importtime', stdout=StringIO())
+
+    def test_report(self):
+        stdout = StringIO()
+        call_command('importtime', '--top', '3', '--no-warmup', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('WSGI application loaded in'))
+        self.assertEqual(len(lines), 2 + 3)
+        self.assertIn('config.wsgi', lines[2])
@@ -11,6 +11,9 @@ from .views import (
     DashboardSummaryAPIView, DashboardChartsAPIView,
     DashboardActivityAPIView,
     RandomDataGenerateAPIView,
+    ChangeFeedAPIView,
+    MetricsAPIView,
+    ProfileListAPIView, ProfileDetailAPIView, ProfileDownloadAPIView,
 )
 
 urlpatterns = [
@@ -39,6 +42,17 @@ urlpatterns = [
     path('dashboard/charts/', DashboardChartsAPIView.as_view(), name='dashboard-charts'),
     path('dashboard/activity/', DashboardActivityAPIView.as_view(), name='dashboard-activity'),
 
+    # Incremental sync
+    path('changes/', ChangeFeedAPIView.as_view(), name='change-feed'),
+
+    # Request metrics (admin only)
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
+
+    # Request profiles (admin only)
+    path('profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('profiles/<str:capture_id>/', ProfileDetailAPIView.as_view(), name='profile-detail'),
+    path('profiles/<str:capture_id>/download/', ProfileDownloadAPIView.as_view(), name='profile-download'),
+
     # Random data generator
     path('generate/', RandomDataGenerateAPIView.as_view(), name='random-data-generate'),
 ]
\ No newline at end of file
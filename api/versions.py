@@ -0,0 +1,53 @@
+"""
+Per-table version counters.
+
+Every write to a tracked table bumps its counter (see api/signals.py). The
+counters live in the database so all workers agree on them, and they key the
+dashboard response cache and the ETags of GET endpoints.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import F
+
+from .models import TableVersion
+
+_pending_tables = ContextVar('pending_version_bumps', default=None)
+
+
+def get_versions(tables):
+    """Return ``{table: version}``; unknown tables are at version 0."""
+    versions = dict(TableVersion.objects.filter(table__in=tables).values_list('table', 'version'))
+    return {table: versions.get(table, 0) for table in tables}
+
+
+def bump(*tables):
+    """Bump the counters of the given tables, or collect them while batching."""
+    pending = _pending_tables.get()
+    if pending is not None:
+        pending.update(tables)
+        return
+    tables = set(tables)
+    updated = TableVersion.objects.filter(table__in=tables).update(version=F('version') + 1)
+    if updated < len(tables):
+        existing = set(TableVersion.objects.filter(table__in=tables).values_list('table', flat=True))
+        TableVersion.objects.bulk_create(
+            [TableVersion(table=table, version=1) for table in tables - existing],
+            ignore_conflicts=True,
+        )
+
+
+@contextmanager
+def batched_bumps():
+    """Collect bumps and apply them once per table on exit."""
+    if _pending_tables.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending_tables.set(pending)
+    try:
+        yield
+    finally:
+        _pending_tables.reset(token)
+        if pending:
+            bump(*pending)
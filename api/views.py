@@ -1,17 +1,26 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from .models import User, Employee, Product, Order, OrderItem
 from .serializers import (
     EmployeeSerializer, RegisterSerializer, UserSerializer, 
     ProductSerializer, OrderSerializer
 )
+from .cache import cached_response, get_ttl
+from .dashboard import (
+    SUMMARY_TABLES, CHARTS_TABLES, ACTIVITY_TABLES,
+    get_summary, get_charts, get_activity,
+)
+from .conditional import ConditionalGetMixin, conditional_get
+from .compiled import CompiledListMixin
+from .signals import batched_writes
+from .changes import CursorExpired, get_changes, get_cursor
+from .metrics import registry
+from .profiling import list_captures, load_capture, capture_paths
+from .generators import get_faker, get_password_hash
 from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth
-from faker import Faker
+from django.http import HttpResponse, FileResponse
 import random
 
 
@@ -23,18 +32,21 @@ class RegisterAPIView(generics.CreateAPIView):
 
 # Employees:
 # single insert
-class EmployeeListCreateAPIView(generics.ListCreateAPIView):
+class EmployeeListCreateAPIView(ConditionalGetMixin, CompiledListMixin, generics.ListCreateAPIView):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('employee',)
+    compiled_list = True
     filterset_fields = ['department', 'position']  
     search_fields = ['name', 'position', 'department']  
     ordering_fields = ['salary', 'hire_date', 'performance_score', 'department']  
 
-class EmployeeRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class EmployeeRetrieveUpdateDestroyAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('employee',)
 
 # Bulk insert
 class EmployeeBulkCreateAPIView(APIView):
@@ -47,32 +59,38 @@ class EmployeeBulkCreateAPIView(APIView):
         else:
             serializer = EmployeeSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with batched_writes():
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 # Users
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(ConditionalGetMixin, CompiledListMixin, generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('user',)
+    compiled_list = True
     filterset_fields = ['role', 'is_active']  
     search_fields = ['username', 'email']     
     ordering_fields = ['date_joined', 'username', 'role']
 
-class UserRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class UserRetrieveUpdateDestroyAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('user',)
 
 
 
 # Products: 
 # Single insert
-class ProductListCreateAPIView(generics.ListCreateAPIView):
+class ProductListCreateAPIView(ConditionalGetMixin, CompiledListMixin, generics.ListCreateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('product',)
+    compiled_list = True
     filterset_fields = ['category']
     search_fields = ['name', 'category']
     ordering_fields = ['price', 'stock']
@@ -88,121 +106,153 @@ class ProductBulkCreateAPIView(APIView):
         else:
             serializer = ProductSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with batched_writes():
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 # Read, Update, Delete
-class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('product',)
 
 
 # Orders
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+class OrderListCreateAPIView(ConditionalGetMixin, CompiledListMixin, generics.ListCreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('order',)
+    compiled_list = True
     filterset_fields = ['status', 'user']
     search_fields = []
     ordering_fields = ['order_date', 'total_amount'] 
 
-class OrderRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class OrderRetrieveUpdateDestroyAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    version_tables = ('order',)
 
 
 # Dashboard
 class DashboardSummaryAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(*SUMMARY_TABLES)
+    @cached_response('dashboard-summary', tables=SUMMARY_TABLES)
     def get(self, request):
-        total_users = User.objects.count()
-        total_employees = Employee.objects.count()
-        total_products = Product.objects.count()
-        total_orders = Order.objects.count()
-        pending_orders= Order.objects.filter(status='pending').count() #added later
-        completed_orders= Order.objects.filter(status='completed').count() #added later
-        cancelled_orders= Order.objects.filter(status='cancelled').count() #added later
-        total_revenue = Order.objects.filter(status='completed').aggregate(
-            revenue=Sum('total_amount')
-        )['revenue'] or 0
-        due_revenue = Order.objects.filter(status='pending').aggregate(
-            revenue=Sum('total_amount')
-        )['revenue'] or 0
-
-        return Response({
-            "total_users": total_users,
-            "total_employees": total_employees,
-            "total_products": total_products,
-            "total_orders": total_orders,
-            "pending_orders":pending_orders, #added later
-            "completed_orders":completed_orders, #added later
-            "cancelled_orders":cancelled_orders, #added later
-            "total_revenue": total_revenue,
-            "due_revenue": due_revenue, # added later
-        })
+        return Response(get_summary())
 
 
 
 class DashboardChartsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # Orders per month covers a window ending now, so it changes without writes
+    @conditional_get(*CHARTS_TABLES, max_age=get_ttl('dashboard-charts'))
+    @cached_response('dashboard-charts', tables=CHARTS_TABLES)
     def get(self, request):
-        # Orders per month (last 6 months)
-        six_months_ago = timezone.now() - timedelta(days=180)
-        orders_per_month = (
-            Order.objects.filter(order_date__gte=six_months_ago)
-            .annotate(month=TruncMonth('order_date'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-
-        # Top 5 products by order count
-        top_products = (
-            Order.objects.values('product__name', 'product__category', 'product__price')
-            .annotate(order_count=Count('id'))
-            .order_by('-order_count')[:5]
-        )
-
-        return Response({
-            "orders_per_month": orders_per_month,
-            "top_products": top_products,
-        })
+        return Response(get_charts())
 
 
 class DashboardActivityAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(*ACTIVITY_TABLES)
+    @cached_response('dashboard-activity', tables=ACTIVITY_TABLES)
+    def get(self, request):
+        return Response(get_activity())
+
+
+
+# Incremental sync
+class ChangeFeedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 1000
+
     def get(self, request):
-        recent_orders = Order.objects.order_by('-order_date')[:5]
-        recent_users = User.objects.order_by('-date_joined')[:5]
-        recent_employees = Employee.objects.order_by('-hire_date')[:5]
-        return Response({
-            "recent_orders": OrderSerializer(recent_orders, many=True).data,
-            "recent_users": UserSerializer(recent_users, many=True).data,
-            "recent_employees": EmployeeSerializer(recent_employees, many=True).data,
-        })
+        since = request.query_params.get('since')
+        if since is None:
+            # Start of a sync: hand out the cursor to continue from
+            return Response({"cursor": get_cursor(), "has_more": False, "changes": {}})
+        try:
+            since = int(since)
+            limit = min(int(request.query_params.get('limit', self.max_limit)), self.max_limit)
+        except ValueError:
+            return Response({"error": "'since' and 'limit' must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({"error": "'since' must be >= 0 and 'limit' >= 1."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(get_changes(since, limit))
+        except CursorExpired:
+            return Response(
+                {"error": "Cursor is too old, changes after it were pruned. Reload the lists and sync from a new cursor."},
+                status=status.HTTP_410_GONE
+            )
+
+
+# Request metrics in the Prometheus text format
+class MetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Request profiles (admin only)
+class ProfileListAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_captures())
+
+
+class ProfileDetailAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, capture_id):
+        capture = load_capture(capture_id)
+        if capture is None:
+            return Response({"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(capture)
+
+
+class ProfileDownloadAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, capture_id):
+        paths = capture_paths(capture_id)
+        if paths is None or not paths[1].exists():
+            return Response({"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(paths[1].open('rb'), as_attachment=True, filename=paths[1].name)
 
 
 class RandomDataGenerateAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        fake = Faker()
+        # Rows are created one by one; invalidate dependent caches once
+        with batched_writes():
+            return self.generate(request)
+
+    def generate(self, request):
+        fake = get_faker()
         data_type = request.data.get('type')
         amount = int(request.data.get('amount', 10))
         created = 0
 
         if data_type == 'users':
             for _ in range(amount):
-                User.objects.create_user(
-                    username=fake.unique.user_name(),
-                    email=fake.unique.email(),
-                    password='password123',
+                # Faker's unique values only hold within this call
+                username = User.normalize_username(fake.unique.user_name())
+                while User.objects.filter(username=username).exists():
+                    username = User.normalize_username(fake.unique.user_name())
+                User.objects.create(
+                    username=username,
+                    email=User.objects.normalize_email(fake.unique.email()),
+                    password=get_password_hash(),
                     role=random.choice(['user', 'manager', 'admin'])
                 )
                 created += 1
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.metrics.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -107,6 +109,88 @@ DATABASES = {
     }
 }
 
+# 'production' tunes SQLite for concurrent serving: WAL journaling, pragmas,
+# persistent connections and a separate read-only connection for safe
+# requests (see api/routers.py).
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+if DB_PROFILE == 'production':
+    _SQLITE_PRAGMAS = ';'.join([
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA cache_size={int(os.environ.get('SQLITE_CACHE_SIZE', -65536))}",
+        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))}",
+        f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+        'PRAGMA temp_store=MEMORY',
+    ])
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': f'PRAGMA journal_mode=WAL;{_SQLITE_PRAGMAS}',
+            # Take the write lock when the transaction starts rather than
+            # failing to upgrade a read lock halfway through
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    DATABASES['read'] = {
+        **DATABASES['default'],
+        # as_uri() escapes characters such as '?', '#' and '%' in the path
+        'NAME': f"{Path(DATABASES['default']['NAME']).as_uri()}?mode=ro",
+        # read_uncommitted only affects shared-cache databases, i.e. the
+        # in-memory test database, where it lets the mirror see the data of
+        # the test's open transaction
+        'OPTIONS': {'init_command': f'{_SQLITE_PRAGMAS};PRAGMA read_uncommitted=1'},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['api.routers.ReadWriteRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('api.metrics.QueryTimingMiddleware') + 1, 'api.routers.ReadOnlyRequestMiddleware')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Backend for the dashboard response cache: 'locmem' (per process) or 'file'
+# (entries shared by all workers on the host; recomputation is still only
+# serialized within each worker).
+DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', BASE_DIR / '.cache' / 'dashboard'),
+    } if DASHBOARD_CACHE_BACKEND == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+    },
+}
+
+# Seconds a dashboard response is served from cache. Writes to the underlying
+# tables invalidate entries immediately, so these only bound staleness of
+# time-dependent values.
+DASHBOARD_CACHE_TTL = {
+    'dashboard-summary': int(os.environ.get('DASHBOARD_SUMMARY_TTL', 60)),
+    'dashboard-charts': int(os.environ.get('DASHBOARD_CHARTS_TTL', 300)),
+    'dashboard-activity': int(os.environ.get('DASHBOARD_ACTIVITY_TTL', 60)),
+}
+
+
+# Dashboard SSE stream (ASGI only): open connections allowed per process and
+# seconds between checks for changed tables
+DASHBOARD_STREAM_MAX_CONNECTIONS = int(os.environ.get('DASHBOARD_STREAM_MAX_CONNECTIONS', 500))
+DASHBOARD_STREAM_POLL_INTERVAL = float(os.environ.get('DASHBOARD_STREAM_POLL_INTERVAL', 2))
+
+# Request profiling (see api/profiling.py): share of requests profiled at
+# random, where captures are stored and how many are kept
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+PROFILE_MAX_CAPTURES = int(os.environ.get('PROFILE_MAX_CAPTURES', 50))
+
+# Days of history kept for the /changes/ feed (see `manage.py prune_changes`)
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
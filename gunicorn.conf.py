@@ -0,0 +1,27 @@
+# Gunicorn settings, picked up automatically from the working directory.
+# Workers and bind address keep gunicorn's defaults ($WEB_CONCURRENCY, $PORT).
+import os
+
+# Load the app, and warm it up, once in the master so forked workers start
+# ready to serve
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    if preload_app:
+        from api.warmup import warm_up
+        server.log.info("Warmed up in %.2fs", warm_up())
+
+
+def post_fork(server, worker):
+    from django.db import connections
+    connections.close_all()
+    if preload_app:
+        from api.generators import reseed_faker
+        reseed_faker()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from api.warmup import warm_up
+        worker.log.info("Warmed up in %.2fs", warm_up())